@@ -18,6 +18,10 @@ from services.app import FirewallApp
 def main() -> None:
     app = FirewallApp()
     app.run()
+    if app.exit_apply_error is not None:
+        # The TUI is gone by now, so a toggle made just before quitting is reported here.
+        print(f"phoque: last apply failed: {app.exit_apply_error}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import re
 import subprocess
 import shlex
-from typing import Callable, List, Optional
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from uuid import UUID
 
 from .rules import Rule
 from .types import IDatabaseService
 
+# Matches whole `-A` lines of iptables-save output that carry a phoque comment.
+_TAGGED_RULE_RE = re.compile(r'^-A .*--comment "?phoque-.*$', re.MULTILINE)
+_APPLY_MODES = ("restore", "sequential")
+
 
 class FirewallError(Exception):
     pass
@@ -24,103 +30,186 @@ class FirewallManager:
     def __init__(self, db: IDatabaseService) -> None:
         self.db = db
         self.rules: List[Rule] = self.db.load()
+        # Id index for O(1) lookups; self.rules keeps the display/apply order.
+        self._by_id: Dict[str, Rule] = {rule.id_str: rule for rule in self.rules}
+        self._dirty = False
+        self._in_batch = False
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Defer persistence of every mutation in the block to a single save."""
+        previous = self._in_batch
+        self._in_batch = True
+        try:
+            yield
+        finally:
+            self._in_batch = previous
+            if not previous and self._dirty:
+                self._persist()
+
+    def _persist(self) -> None:
+        """Save the rules now, or mark them dirty while a batch is open."""
+        self._dirty = True
+        if self._in_batch:
+            return
+        self.db.save(self.rules)
+        self._dirty = False
+
+    def mark_dirty(self) -> None:
+        """Record an in-place rule change (e.g. a toggle) for the next flush()."""
+        self._dirty = True
+
+    def flush(self) -> bool:
+        """Save pending changes outside of a batch; return True if a save happened."""
+        if not self._dirty or self._in_batch:
+            return False
+        self._persist()
+        return True
 
     def add_rule(self, rule: Rule) -> None:
         """Add a new rule and persist it."""
         self.rules.append(rule)
-        self.db.save(self.rules)
+        self._by_id[rule.id_str] = rule
+        self._persist()
+
+    def add_rules(self, rules: Iterable[Rule]) -> None:
+        """Add several rules with a single save."""
+        with self.batch():
+            for rule in rules:
+                self.add_rule(rule)
 
     def update_rule(self, rule_id: str | UUID, new_rule: Rule) -> bool:
         """Replace an existing rule while keeping its id/active flag."""
         normalized = str(rule_id)
-        for idx, rule in enumerate(self.rules):
-            if str(rule.id) == normalized:
-                new_rule.id = rule.id
-                new_rule.active = rule.active
-                self.rules[idx] = new_rule
-                self.db.save(self.rules)
-                return True
-        return False
+        rule = self._by_id.get(normalized)
+        if rule is None:
+            return False
+        new_rule.id = rule.id
+        new_rule.active = rule.active
+        self.rules[self.rules.index(rule)] = new_rule
+        self._by_id[normalized] = new_rule
+        self._persist()
+        return True
 
     def get_rule(self, rule_id: str | UUID) -> Optional[Rule]:
         """Return a rule by id or None."""
-        normalized = str(rule_id)
-        for rule in self.rules:
-            if str(rule.id) == normalized:
-                return rule
-        return None
+        return self._by_id.get(str(rule_id))
 
-    def remove_rule(self, rule_id: str | UUID, runner: Optional[Callable[[str], None]] = None) -> bool:
-        """De-apply and delete a rule; return True if removed."""
+    def remove_rule(
+        self,
+        rule_id: str | UUID,
+        runner: Optional[Callable[[str], None]] = None,
+        deapply: bool = True,
+    ) -> bool:
+        """Delete a rule, de-applying it first unless deapply=False; return True if removed."""
         normalized = str(rule_id)
-        for idx, rule in enumerate(self.rules):
-            if str(rule.id) == normalized:
-                # De-apply before removal
-                self._deapply_rule(rule, runner)
-                del self.rules[idx]
-                self.db.save(self.rules)
-                return True
-        return False
+        rule = self._by_id.get(normalized)
+        if rule is None:
+            return False
+        # De-apply before removal
+        if deapply:
+            self._deapply_rule(rule, runner)
+        del self._by_id[normalized]
+        self.rules.remove(rule)
+        self._persist()
+        return True
 
     def apply_configuration(
         self,
         execute: bool = True,
         runner: Optional[Callable[[str], None]] = None,
+        mode: str = "restore",
     ) -> List[str]:
         """Apply all active rules; returns executed commands. If execute=False, dry-run."""
+        # "restore" commits everything in one iptables-restore transaction;
+        # "sequential" runs one iptables process per command, which is also
+        # how injected runners always receive them.
+        if mode not in _APPLY_MODES:
+            raise ValueError(f"Unknown apply mode: {mode}")
         commands = [rule.get_command() for rule in self.rules if rule.active]
         if not execute:
             return commands
 
-        # Remove any previously applied rules tagged by this tool before re-applying.
-        self._cleanup_existing_rules(runner=runner)
-        for command in commands:
-            self._run_command(command, runner)
+        if runner or mode == "sequential":
+            self._cleanup_existing_rules(runner=runner)
+            for command in commands:
+                self._run_command(command.split(), runner)
+            return commands
+
+        # Cleanup and re-apply go through a single iptables-restore call so the
+        # kernel commits the whole ruleset at once instead of once per rule.
+        payload = self.build_restore_payload(self._list_tagged_rules(), commands)
+        self._run_restore(payload)
         return commands
 
+    @staticmethod
+    def build_restore_payload(delete_lines: List[str], commands: List[str]) -> str:
+        """Build an iptables-restore payload deleting tagged rules then appending commands."""
+        lines = ["*filter"]
+        lines += [line.replace("-A", "-D", 1) for line in delete_lines]
+        # Rule commands start with the binary name; restore expects only the arguments.
+        lines += [command.split(" ", 1)[1] for command in commands]
+        lines.append("COMMIT")
+        return "\n".join(lines) + "\n"
+
+    def _run_restore(self, payload: str) -> None:
+        """Pipe a payload to iptables-restore without flushing foreign rules."""
+        command = ["iptables-restore", "--noflush"]
+        completed = subprocess.run(
+            command,
+            input=payload,
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandExecutionError(" ".join(command), completed.stderr.strip())
+
     def _run_command(
         self,
-        command: str,
+        command: List[str],
         runner: Optional[Callable[[str], None]] = None,
         ignore_errors: bool = False,
     ) -> None:
-        """Run a shell command or pass to injected runner."""
+        """Run an argv list directly, or pass it as a shell string to an injected runner."""
         if runner:
-            runner(command)
+            runner(shlex.join(command))
             return
 
         completed = subprocess.run(
-            command if isinstance(command, list) else shlex.split(command),
+            command,
             check=False,
             capture_output=True,
             text=True,
         )
         if completed.returncode != 0 and not ignore_errors:
-            raise CommandExecutionError(command, completed.stderr.strip())
+            raise CommandExecutionError(shlex.join(command), completed.stderr.strip())
 
     def _cleanup_existing_rules(
         self,
         runner: Optional[Callable[[str], None]] = None,
     ) -> None:
         """Delete previously tagged rules so apply starts from a clean slate."""
-        for chain in ("INPUT", "OUTPUT", "FORWARD"):
-            list_cmd = f"iptables -S {chain}"
-            completed = subprocess.run(
-                list_cmd.split(),
-                check=False,
-                capture_output=True,
-                text=True,
-            )
-            if completed.returncode != 0:
-                continue
-            for line in completed.stdout.splitlines():
-                if 'comment "phoque-' not in line and "comment phoque-" not in line:
-                    continue
-                if not line.startswith("-A"):
-                    continue
-                delete_cmd = line.replace("-A", "-D", 1)
-                full_cmd = f"iptables {delete_cmd}"
-                self._run_command(full_cmd, runner, ignore_errors=True)
+        tagged = self._list_tagged_rules()
+        if not tagged:
+            return
+        for line in tagged:
+            # iptables-save may quote the comment, so tokenize with shlex here.
+            delete_cmd = ["iptables", *shlex.split(line.replace("-A", "-D", 1))]
+            self._run_command(delete_cmd, runner, ignore_errors=True)
+
+    def _list_tagged_rules(self) -> List[str]:
+        """Return the `-A` lines of rules previously applied by this tool."""
+        # One iptables-save dump covers every chain of the filter table.
+        completed = subprocess.run(
+            ["iptables-save", "-t", "filter"],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            return []
+        return _TAGGED_RULE_RE.findall(completed.stdout)
 
     def _deapply_rule(
         self,
@@ -128,12 +217,8 @@ class FirewallManager:
         runner: Optional[Callable[[str], None]] = None,
     ) -> None:
         """Remove a single rule from the system."""
-        # Remove rule from all chains it could have been applied to.
-        target_map = {
-            "ALLOW": "ACCEPT",
-            "DENY": "DROP",
-            "REJECT": "REJECT",
-        }
-        target = target_map.get(rule.type_name, "DROP")
-        delete_cmd = rule.get_delete_command(target)
+        # Each Rule subclass already knows its own target.
+        # Rule commands never contain quoted or whitespace-bearing tokens,
+        # so a plain split is an exact tokenization (no shlex pass needed).
+        delete_cmd = rule.get_delete_command().split()
         self._run_command(delete_cmd, runner, ignore_errors=True)
@@ -2,26 +2,89 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from functools import lru_cache
-from pathlib import Path
+import os
 import re
 import socket
-from typing import Dict, Optional, Type, Union
+import time
+from typing import Callable, ClassVar, Dict, Optional, Tuple, Type, Union
 from uuid import UUID, uuid4
 
 from .types import Direction, Protocol
 
+SYSFS_NET = "/sys/class/net"
 _INTERFACE_PATTERN = re.compile(r"^[A-Za-z0-9_.:-]+$")
+# Directory mtimes on sysfs are not always bumped, so the listing also expires.
+_IFACE_TTL = 5.0
+# (sysfs st_mtime_ns or -1 for the socket fallback, monotonic stamp, names)
+_IFACE_CACHE: Optional[Tuple[int, float, Tuple[str, ...]]] = None
+_TMPL_PORT = "iptables -A {chain} -p {proto}{iface} --dport {port} -m comment --comment {comment} -j {target}"
+_TMPL_NOPORT = "iptables -A {chain} -p {proto}{iface} -m comment --comment {comment} -j {target}"
+
+
+def list_system_interfaces() -> Tuple[str, ...]:
+    """Return the host's interface names, sorted; rescanned on sysfs change or after _IFACE_TTL."""
+    global _IFACE_CACHE
+    try:
+        key = os.stat(SYSFS_NET).st_mtime_ns
+    except OSError:
+        key = -1
+    now = time.monotonic()
+    if _IFACE_CACHE is not None:
+        cached_key, stamp, names = _IFACE_CACHE
+        if cached_key == key and now - stamp < _IFACE_TTL:
+            return names
+    names = _scan_interfaces()
+    _IFACE_CACHE = (key, now, names)
+    return names
+
+
+def _scan_interfaces() -> Tuple[str, ...]:
+    try:
+        with os.scandir(SYSFS_NET) as entries:
+            # Interfaces are symlinks into /sys/devices; control files such as
+            # bonding_masters are regular files. is_symlink() reads d_type, no stat.
+            names = [entry.name for entry in entries if entry.is_symlink()]
+    except OSError:
+        try:
+            names = [name for _, name in socket.if_nameindex()]
+        except OSError:
+            names = []
+    return tuple(sorted(set(filter(None, names)), key=str.lower))
+
+
+def _command_getter(target: str) -> Callable[["Rule"], str]:
+    """Build a get_command specialized for one iptables target."""
+    def get_command(self: "Rule") -> str:
+        # The cached string is only reused while the fields it was built from match.
+        key = (self.direction, self.protocol, self.port, self.interface, self.id)
+        cached = self._cmd_cache.get(target)
+        if cached is None or cached[0] != key:
+            cached = self._cmd_cache[target] = (key, self._build_command(target))
+        return cached[1]
 
+    return get_command
 
-@dataclass
+
+@dataclass(slots=True)
 class Rule(ABC):
+    # iptables jump target; subclasses that set it get a generated get_command.
+    TARGET: ClassVar[str]
+
     direction: Direction
     protocol: Protocol
     port: Optional[str] = None
     interface: Optional[str] = None
     active: bool = True
     id: UUID = field(default_factory=uuid4)
+    _cmd_cache: Dict[str, Tuple[tuple, str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _str_id: Optional[Tuple[UUID, str]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        # Explicit form: zero-argument super() does not work in slots=True dataclasses.
+        super(Rule, cls).__init_subclass__(**kwargs)
+        target = cls.__dict__.get("TARGET")
+        if target is not None:
+            cls.get_command = _command_getter(target)
 
     def __post_init__(self) -> None:
         if self.interface is not None:
@@ -39,35 +102,49 @@ class Rule(ABC):
     def type_name(self) -> str:
         return self.__class__.__name__.replace("Rule", "").upper()
 
+    @property
+    def id_str(self) -> str:
+        # Keyed on the UUID so reassigning id (see FirewallManager.update_rule) is seen.
+        cached = self._str_id
+        if cached is None or cached[0] is not self.id:
+            cached = self._str_id = (self.id, str(self.id))
+        return cached[1]
+
     @property
     def short_id(self) -> str:
-        return str(self.id).split("-")[0]
+        # The first 8 characters of the canonical form equal id.hex[:8].
+        return self.id_str[:8]
 
     @property
     def comment(self) -> str:
         return f"phoque-{self.short_id}"
 
     def _build_command(self, target: str) -> str:
-        parts = [
-            "iptables",
-            "-A",
-            self.direction.chain,
-            "-p",
-            self.protocol.cli_value,
-        ]
+        iface = ""
         if self.interface:
             # Use -i for incoming/forward traffic, -o for outgoing.
             iface_flag = "-o" if self.direction == Direction.OUT else "-i"
-            parts += [iface_flag, self.interface]
-        if self.protocol != Protocol.ICMP and self.port not in (None, "*"):
-            parts += ["--dport", self._format_port_for_cli(self.port)]
-        parts += ["-m", "comment", "--comment", self.comment]
-        parts += ["-j", target]
-        return " ".join(parts)
-
-    def get_delete_command(self, target: str) -> str:
+            iface = f" {iface_flag} {self.interface}"
+        if self.protocol == Protocol.ICMP or self.port in (None, "*"):
+            return _TMPL_NOPORT.format(
+                chain=self.direction.chain,
+                proto=self.protocol.cli_value,
+                iface=iface,
+                comment=self.comment,
+                target=target,
+            )
+        return _TMPL_PORT.format(
+            chain=self.direction.chain,
+            proto=self.protocol.cli_value,
+            iface=iface,
+            port=self._format_port_for_cli(self.port),
+            comment=self.comment,
+            target=target,
+        )
+
+    def get_delete_command(self, target: Optional[str] = None) -> str:
         # Switch append to delete; keep the same match criteria.
-        return self._build_command(target).replace("iptables -A", "iptables -D", 1)
+        return self._build_command(target or self.TARGET).replace("iptables -A", "iptables -D", 1)
 
     @abstractmethod
     def get_command(self) -> str:
@@ -75,7 +152,7 @@ class Rule(ABC):
 
     def to_dict(self) -> Dict[str, object]:
         return {
-            "id": str(self.id),
+            "id": self.id_str,
             "direction": self.direction.value,
             "protocol": self.protocol.value,
             "port": self.port,
@@ -137,50 +214,25 @@ class Rule(ABC):
             return None
         if not _INTERFACE_PATTERN.match(value):
             raise ValueError("Interface name contains invalid characters")
-        known = self._system_interfaces()
+        known = list_system_interfaces()
         if known and value not in known:
             raise ValueError(f"Unknown interface: {value}")
         return value
 
-    @staticmethod
-    @lru_cache(maxsize=1)
-    def _system_interfaces() -> tuple[str, ...]:
-        sysfs = Path("/sys/class/net")
-        if sysfs.exists():
-            names = [path.name for path in sysfs.iterdir() if path.is_dir()]
-        else:
-            try:
-                names = [name for _, name in socket.if_nameindex()]
-            except OSError:
-                names = []
-        return tuple(sorted({name for name in names if name}, key=str.lower))
-
 
 class AllowRule(Rule):
-    def get_command(self) -> str:
-        return self._build_command("ACCEPT")
-
-    def get_delete_command(self, target: str | None = None) -> str:
-        resolved = target or "ACCEPT"
-        return super().get_delete_command(resolved)
+    __slots__ = ()
+    TARGET = "ACCEPT"
 
 
 class DenyRule(Rule):
-    def get_command(self) -> str:
-        return self._build_command("DROP")
-
-    def get_delete_command(self, target: str | None = None) -> str:
-        resolved = target or "DROP"
-        return super().get_delete_command(resolved)
+    __slots__ = ()
+    TARGET = "DROP"
 
 
 class RejectRule(Rule):
-    def get_command(self) -> str:
-        return self._build_command("REJECT")
-
-    def get_delete_command(self, target: str | None = None) -> str:
-        resolved = target or "REJECT"
-        return super().get_delete_command(resolved)
+    __slots__ = ()
+    TARGET = "REJECT"
 
 
 _RULE_TYPES: Dict[str, Type[Rule]] = {
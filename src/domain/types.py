@@ -14,11 +14,7 @@ class Direction(str, Enum):
 
     @property
     def chain(self) -> str:
-        return {
-            Direction.IN: "INPUT",
-            Direction.OUT: "OUTPUT",
-            Direction.FORWARD: "FORWARD",
-        }[self]
+        return _CHAINS[self]
 
 
 class Protocol(str, Enum):
@@ -28,7 +24,16 @@ class Protocol(str, Enum):
 
     @property
     def cli_value(self) -> str:
-        return self.value.lower()
+        return _CLI_VALUES[self]
+
+
+# Built once at import; the properties above only index into them.
+_CHAINS = {
+    Direction.IN: "INPUT",
+    Direction.OUT: "OUTPUT",
+    Direction.FORWARD: "FORWARD",
+}
+_CLI_VALUES = {protocol: protocol.value.lower() for protocol in Protocol}
 
 
 class IDatabaseService(TypingProtocol):
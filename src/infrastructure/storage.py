@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from domain.rules import Rule
 from domain.types import IDatabaseService
@@ -14,6 +15,8 @@ class JsonDatabase(IDatabaseService):
     def __init__(self, file_path: Path | str) -> None:
         self.file_path = Path(file_path)
         self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Encoded JSON object per rule state, so a save only re-encodes changed rules.
+        self._fragments: Dict[Tuple[object, ...], bytes] = {}
 
     @classmethod
     def get_instance(cls, file_path: Path | str | None = None) -> "JsonDatabase":
@@ -32,18 +35,49 @@ class JsonDatabase(IDatabaseService):
 
     def save(self, rules: List[Rule]) -> None:
         """Persist rules to disk as JSON."""
-        payload = [rule.to_dict() for rule in rules]
-        with self.file_path.open("w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+        fragments: Dict[Tuple[object, ...], bytes] = {}
+        parts: List[bytes] = []
+        for rule in rules:
+            key = self._state_key(rule)
+            encoded = self._fragments.get(key)
+            if encoded is None:
+                encoded = self._encode(rule.to_dict())
+            fragments[key] = encoded
+            parts.append(encoded)
+        # Keep only current states so toggled-away entries do not accumulate.
+        self._fragments = fragments
+        data = b"[" + b",".join(parts) + b"]"
+        # Write beside the target then swap, so an interrupted save never truncates it.
+        tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.file_path)
+
+    @staticmethod
+    def _state_key(rule: Rule) -> Tuple[object, ...]:
+        """Everything to_dict() serializes, as a hashable cache key."""
+        return (
+            rule.id_str,
+            rule.__class__.__name__,
+            rule.direction,
+            rule.protocol,
+            rule.port,
+            rule.interface,
+            rule.active,
+        )
+
+    @staticmethod
+    def _encode(item: Dict[str, object]) -> bytes:
+        return json.dumps(item, separators=(",", ":")).encode("utf-8")
 
     def load(self) -> List[Rule]:
         """Load rules from disk; empty list on first run or parse error."""
         if not self.file_path.exists():
             return []
         try:
-            with self.file_path.open(encoding="utf-8") as f:
-                raw = json.load(f)
-        except json.JSONDecodeError:
+            data = self.file_path.read_bytes()
+            raw = json.loads(data)
+        except ValueError:
+            # Covers json.JSONDecodeError and bad UTF-8.
             return []
 
         rules: List[Rule] = []
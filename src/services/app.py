@@ -1,82 +1,144 @@
 from __future__ import annotations
 
-from typing import Dict, Type
+import threading
+from functools import lru_cache, partial
+from typing import Dict, Optional, Type
 
-from rich.markup import escape
+from rich.text import Text
 from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.message import Message
 from textual.widgets import RichLog, Static
 
 from domain.manager import CommandExecutionError, FirewallManager
 from domain.rules import AllowRule, DenyRule, RejectRule, Rule
-from domain.types import Direction, Protocol
+from domain.types import Protocol
 from infrastructure.storage import JsonDatabase
 from .widgets import AddRuleScreen, ConfirmDialog, RuleForm, RuleTable
 
+_SEVERITY_COLORS = {
+    "info": "sky_blue3",
+    "warning": "yellow1",
+    "error": "red1",
+    "success": "spring_green3",
+}
+_DEFAULT_COLOR = "plum1"
+_ACTION_MAP: Dict[str, Type[Rule]] = {
+    "allow": AllowRule,
+    "deny": DenyRule,
+    "reject": RejectRule,
+}
+_BINDINGS = (
+    Binding("q", "quit", "Quitter"),
+    Binding("a", "add_rule", "Ajouter"),
+    Binding("d", "delete_rule", "Supprimer"),
+    Binding("e", "edit_rule", "Editer"),
+    Binding("p", "apply_rules", "Appliquer"),
+    Binding("t", "focus_table", "Focus table"),
+    Binding("ctrl+c", "force_quit", "Quit (no prompt)"),
+    Binding("x", "toggle_rule", "Toggle"),
+)
+
+_ADDED_TMPL_PORT = "Added: {t} {d} {p} port {port}{iface} (inactive by default)"
+_ADDED_TMPL_NOPORT = "Added: {t} {d} {p}{iface} (inactive by default)"
+_UPDATED_TMPL_PORT = "Updated: {t} {d} {p} port {port}{iface}"
+_UPDATED_TMPL_NOPORT = "Updated: {t} {d} {p}{iface}"
+_HELP_STRINGS = {
+    label: f"Shortcuts: [a]dd, [e]dit, [d]elete, [x] toggle, [p] {label}, [t] focus table, [q] quit."
+    for label in ("toggle all", "untoggle all", "toggle remaining")
+}
+
+
+def _format_rule_message(rule: Rule, port_template: str, noport_template: str) -> str:
+    """Fill the log template matching whether the rule carries a port."""
+    template = port_template if rule.port else noport_template
+    return template.format(
+        t=rule.type_name,
+        d=rule.direction.value,
+        p=rule.protocol.value,
+        port=rule.port,
+        iface=f" iface {rule.interface}" if rule.interface else "",
+    )
+
+
+@lru_cache(maxsize=8)
+def _resolve_action(name: str) -> Optional[Type[Rule]]:
+    """Map a form action name to its Rule class, case-insensitively."""
+    return _ACTION_MAP.get(name.lower())
+
 
 class FirewallApp(App):
-    CSS = """
-    Screen {
-        layout: vertical;
-    }
-    #banner { padding: 0 1; }
-    #rules_table { height: 1fr; }
-    #log { height: 10; border: solid #2f2f2f; padding: 0 1; }
-    #help { color: #8a8a8a; padding: 0 1; }
-    """
-
-    BINDINGS = [
-        ("q", "quit", "Quitter"),
-        ("a", "add_rule", "Ajouter"),
-        ("d", "delete_rule", "Supprimer"),
-        ("e", "edit_rule", "Editer"),
-        ("p", "apply_rules", "Appliquer"),
-        ("t", "focus_table", "Focus table"),
-        ("ctrl+c", "force_quit", "Quit (no prompt)"),
-        ("x", "toggle_rule", "Toggle"),
-    ]
+    class ApplyFinished(Message):
+        """Outcome of a background apply, delivered back on the UI thread."""
+
+        def __init__(self, summary: Optional[str], error: Optional[str], hint: Optional[str] = None) -> None:
+            super().__init__()
+            self.summary = summary
+            self.error = error
+            self.hint = hint
+
+    CSS_PATH = "app.tcss"
+
+    BINDINGS = _BINDINGS
 
     def __init__(self) -> None:
         super().__init__()
         self.manager = FirewallManager(JsonDatabase.get_instance())
+        # Serializes worker applies so two iptables-restore runs never race.
+        self._apply_lock = threading.Lock()
+        # Set when the apply run on exit fails; main() reports it once the terminal is restored.
+        self.exit_apply_error: Optional[str] = None
 
     def compose(self) -> ComposeResult:
         """Layout main screen: banner, table, log, and dynamic help."""
         yield Static("phoque - firewall TUI", id="banner")
         yield RuleTable(id="rules_table")
-        yield RichLog(id="log", highlight=False, markup=True, wrap=False)
+        yield RichLog(id="log", highlight=False, markup=False, wrap=False)
         yield Static("", id="help", markup=False)
 
     def on_mount(self) -> None:
         """Initialize state and focus."""
+        # Widget identity is fixed by compose; resolve the selectors once.
+        self._rules_table = self.query_one("#rules_table", RuleTable)
+        self._log_widget = self.query_one("#log", RichLog)
+        self._help_widget = self.query_one("#help", Static)
+        self._help_label: Optional[str] = None
+        self._confirm_dialog: Optional[ConfirmDialog] = None
+        self._rules_dirty = False
+        # Toggles only mark state dirty; a short tick saves and applies once
+        # for any burst of key presses.
+        self._apply_pending = False
+        self.set_interval(0.5, self._flush_if_dirty)
         self.refresh_rules()
-        self.query_one(RuleTable).focus_table()
+        self._rules_table.focus_table()
         self._log("Use [a]/[e]/[d]/[x]/[p]/[t]/[q]; navigate with arrow keys.")
 
     def refresh_rules(self) -> None:
-        table = self.query_one("#rules_table", RuleTable)
-        table.update_rules(self.manager.rules)
+        self._rules_table.update_rules(self.manager.rules)
         self._update_help_text()
 
+    def _schedule_refresh(self) -> None:
+        """Redraw the rules once after the current refresh, however many changes queue up."""
+        if self._rules_dirty:
+            return
+        self._rules_dirty = True
+        self.call_after_refresh(self._do_refresh)
+
+    def _do_refresh(self) -> None:
+        self._rules_dirty = False
+        self.refresh_rules()
+
     def _update_help_text(self) -> None:
         """Update shortcut footer with dynamic toggle-all label."""
-        label = self._toggle_all_label()
-        help_text = (
-            f"Shortcuts: [a]dd, [e]dit, [d]elete, [x] toggle, [p] {label}, "
-            "[t] focus table, [q] quit."
-        )
-        self.query_one("#help", Static).update(help_text)
+        label, _, _ = self._summary()
+        if label == self._help_label:
+            return
+        self._help_label = label
+        self._help_widget.update(_HELP_STRINGS[label])
 
     def _log(self, message: str, severity: str = "info") -> None:
         """Write a colored line to the log panel."""
-        colors = {
-            "info": "sky_blue3",
-            "warning": "yellow1",
-            "error": "red1",
-            "success": "spring_green3",
-        }
-        color = colors.get(severity, "plum1")
-        log = self.query_one("#log", RichLog)
-        log.write(f"[{color}]{escape(message)}[/{color}]")
+        self._log_widget.write(Text(message, style=_SEVERITY_COLORS.get(severity, _DEFAULT_COLOR)))
 
     def action_add_rule(self) -> None:
         """Open add-rule modal."""
@@ -85,11 +147,11 @@ class FirewallApp(App):
 
     def action_focus_table(self) -> None:
         """Return focus to the rules table."""
-        self.query_one(RuleTable).focus_table()
+        self._rules_table.focus_table()
 
     def action_delete_rule(self) -> None:
         """Prompt deletion for the selected rule."""
-        table = self.query_one("#rules_table", RuleTable)
+        table = self._rules_table
         selected = table.get_selected_rule_id()
         if not selected:
             self._log("No rule selected", severity="warning")
@@ -99,7 +161,15 @@ class FirewallApp(App):
             self._log("Rule not found", severity="warning")
             return
         msg = "Confirm deletion of the following rule?"
-        self.push_screen(ConfirmDialog(msg, rule=rule), lambda res: self._handle_delete_confirmation(res, selected))
+        dialog = self._confirm_dialog
+        if dialog is None:
+            # Installed screens stay mounted after dismissal, so later deletes
+            # only swap the dialog's content instead of rebuilding it.
+            dialog = self._confirm_dialog = ConfirmDialog(msg, rule=rule)
+            self.install_screen(dialog, name="confirm_delete")
+        else:
+            dialog.configure(msg, rule=rule)
+        self.push_screen(dialog, lambda res: self._handle_delete_confirmation(res, selected))
 
     def action_apply_rules(self) -> None:
         self._apply_rules()
@@ -110,7 +180,7 @@ class FirewallApp(App):
 
     def action_edit_rule(self) -> None:
         """Open edit modal for the selected rule."""
-        table = self.query_one("#rules_table", RuleTable)
+        table = self._rules_table
         selected_id = table.get_selected_rule_id()
         if not selected_id:
             self._log("No rule selected", severity="warning")
@@ -123,7 +193,7 @@ class FirewallApp(App):
 
     def action_toggle_rule(self) -> None:
         """Toggle a single rule active flag and apply immediately."""
-        table = self.query_one("#rules_table", RuleTable)
+        table = self._rules_table
         selected_id = table.get_selected_rule_id()
         if not selected_id:
             self._log("No rule selected", severity="warning")
@@ -132,52 +202,76 @@ class FirewallApp(App):
         if not rule:
             self._log("Rule not found", severity="warning")
             return
-        previous_state = rule.active
         rule.active = not rule.active
-        self.manager.db.save(self.manager.rules)
-        table.update_rules(self.manager.rules)
+        self.manager.mark_dirty()
+        self._apply_pending = True
+        table.update_row_active(selected_id, rule.active)
         state = "activated" if rule.active else "deactivated"
         self._log(f"Rule {state}", severity="info")
-        # Apply immediately to reflect state change on system
-        try:
-            commands = self.manager.apply_configuration(execute=True)
-            self._log(f"Applied {len(commands)} rule(s)", severity="success")
-        except CommandExecutionError as exc:
-            self._log(f"Apply failed: {exc.stderr}", severity="error")
+
+    def on_unmount(self) -> None:
+        """Persist and apply any toggle still waiting for the next tick."""
+        self.manager.flush()
+        if self._apply_pending:
+            # Workers are cancelled on exit, so this last apply runs inline.
+            self._apply_pending = False
+            with self._apply_lock:
+                try:
+                    self.manager.apply_configuration(execute=True, mode="restore")
+                except CommandExecutionError as exc:
+                    self.exit_apply_error = exc.stderr
+
+    def _flush_if_dirty(self) -> None:
+        """Save pending toggles and apply them to the system in one go."""
+        self.manager.flush()
+        if not self._apply_pending:
+            return
+        self._apply_pending = False
+        self._start_apply("Applied {count} rule(s)")
+
+    def _start_apply(self, summary_template: str, failure_hint: Optional[str] = None) -> None:
+        """Run apply_configuration in a worker thread so iptables never blocks the UI."""
+        self.run_worker(
+            partial(self._do_apply, summary_template, failure_hint),
+            thread=True,
+            exclusive=True,
+            group="apply",
+        )
+
+    def _do_apply(self, summary_template: str, failure_hint: Optional[str]) -> None:
+        """Worker body; reports back through an ApplyFinished message."""
+        with self._apply_lock:
+            try:
+                commands = self.manager.apply_configuration(execute=True, mode="restore")
+            except CommandExecutionError as exc:
+                self.post_message(self.ApplyFinished(None, exc.stderr, failure_hint))
+                return
+        self.post_message(self.ApplyFinished(summary_template.format(count=len(commands)), None))
+
+    def on_firewall_app_apply_finished(self, message: ApplyFinished) -> None:
+        """Log the outcome of a background apply."""
+        if message.error is None:
+            self._log(message.summary or "", severity="success")
+            return
+        self._log(f"Apply failed: {message.error}", severity="error")
+        if message.hint:
+            self._log(message.hint, severity="warning")
 
     def _handle_rule_creation(self, event: RuleForm.Submitted) -> tuple[bool, str | None]:
         """Create or update a rule from the submitted form."""
         action_raw = event.action
-        direction_raw = event.direction.value
-        protocol_raw = event.protocol.value
+        # The form already emits Direction/Protocol members; no re-parsing needed.
+        direction = event.direction
+        protocol = event.protocol
         port_raw = event.port if event.port is not None else None
         interface_raw = event.interface if event.interface else None
 
-        action_map: Dict[str, Type[Rule]] = {
-            "allow": AllowRule,
-            "deny": DenyRule,
-            "reject": RejectRule,
-        }
-        rule_cls = action_map.get(action_raw.lower())
+        rule_cls = _resolve_action(action_raw)
         if not rule_cls:
             message = "Unknown action (allow/deny/reject)"
             self._log(message, severity="warning")
             return False, message
 
-        try:
-            direction = Direction(direction_raw.upper())
-        except ValueError:
-            message = "Invalid direction (in/out/forward)"
-            self._log(message, severity="warning")
-            return False, message
-
-        try:
-            protocol = Protocol(protocol_raw.upper())
-        except ValueError:
-            message = "Invalid protocol (tcp/udp/icmp)"
-            self._log(message, severity="warning")
-            return False, message
-
         if protocol != Protocol.ICMP:
             if port_raw is None:
                 message = "Port required for TCP/UDP"
@@ -197,11 +291,9 @@ class FirewallApp(App):
         if event.rule_id:
             updated = self.manager.update_rule(event.rule_id, rule)
             if updated:
-                self.refresh_rules()
-                iface_part = f" iface {rule.interface}" if rule.interface else ""
-                port_part = f" port {rule.port}" if rule.port else ""
+                self._schedule_refresh()
                 self._log(
-                    f"Updated: {rule.type_name} {rule.direction.value} {rule.protocol.value}{port_part}{iface_part}",
+                    _format_rule_message(rule, _UPDATED_TMPL_PORT, _UPDATED_TMPL_NOPORT),
                     severity="success",
                 )
                 return True, None
@@ -213,22 +305,23 @@ class FirewallApp(App):
             # New rules start inactive; let user toggle/apply explicitly.
             rule.active = False
             self.manager.add_rule(rule)
-            self.refresh_rules()
-            iface_part = f" iface {rule.interface}" if rule.interface else ""
+            self._schedule_refresh()
             self._log(
-                f"Added: {rule.type_name} {rule.direction.value} {rule.protocol.value}"
-                + (f" port {rule.port}" if rule.port else "")
-                + iface_part
-                + " (inactive by default)",
+                _format_rule_message(rule, _ADDED_TMPL_PORT, _ADDED_TMPL_NOPORT),
                 severity="info",
             )
             return True, None
 
     def _remove_rule(self, rule_id: str) -> None:
         """Delete a rule by id and refresh UI."""
-        removed = self.manager.remove_rule(rule_id)
+        rule = self.manager.get_rule(rule_id)
+        # Running `iptables -D` here could wait on a worker's restore and freeze
+        # the UI; instead the next worker apply drops the rule's tagged line.
+        removed = self.manager.remove_rule(rule_id, deapply=False)
         if removed:
-            self.refresh_rules()
+            if rule is not None and rule.active:
+                self._apply_pending = True
+            self._schedule_refresh()
             self._log("Rule deleted", severity="success")
         else:
             self._log("Rule not found", severity="warning")
@@ -246,42 +339,45 @@ class FirewallApp(App):
             self._log("No rules to toggle", severity="warning")
             return
 
-        actives = [rule.active for rule in self.manager.rules]
-        if all(actives):
-            # All active -> deactivate all
-            for rule in self.manager.rules:
-                rule.active = False
+        _, any_active, all_active = self._summary()
+        # All active -> deactivate all; otherwise activate whatever is inactive.
+        target_state = not all_active
+        if all_active:
             action_label = "deactivated"
-        elif all(not state for state in actives):
-            # All inactive -> activate all
-            for rule in self.manager.rules:
-                rule.active = True
+        elif not any_active:
             action_label = "activated"
         else:
-            # Mixed -> activate only the inactive ones
-            for rule in self.manager.rules:
-                if not rule.active:
-                    rule.active = True
             action_label = "activated (remaining)"
 
-        self.manager.db.save(self.manager.rules)
-        self.refresh_rules()
-
-        try:
-            commands = self.manager.apply_configuration(execute=True)
-        except CommandExecutionError as exc:
-            self._log(f"Apply failed: {exc.stderr}", severity="error")
-            self._log("Hint: Run with sudo for iptables changes.", severity="warning")
-            return
-        self._log(f"All rules {action_label} and applied ({len(commands)} command(s))", severity="success")
+        for rule in self.manager.rules:
+            rule.active = target_state
+
+        self.manager.mark_dirty()
+        self.manager.flush()
+        # This apply covers any toggle still waiting for the flush tick.
+        self._apply_pending = False
+        self._schedule_refresh()
+        self._start_apply(
+            f"All rules {action_label} and applied ({{count}} command(s))",
+            failure_hint="Hint: Run with sudo for iptables changes.",
+        )
 
-    def _toggle_all_label(self) -> str:
-        """Return the appropriate label for the toggle-all shortcut."""
-        if not self.manager.rules:
-            return "toggle all"
-        actives = [rule.active for rule in self.manager.rules]
-        if all(actives):
-            return "untoggle all"
-        if all(not state for state in actives):
-            return "toggle all"
-        return "toggle remaining"
+    def _summary(self) -> tuple[str, bool, bool]:
+        """Return (toggle-all label, any_active, all_active) from one pass over the rules."""
+        rules = self.manager.rules
+        if not rules:
+            return "toggle all", False, False
+        any_active = False
+        all_active = True
+        for rule in rules:
+            if rule.active:
+                any_active = True
+            else:
+                all_active = False
+        if all_active:
+            label = "untoggle all"
+        elif not any_active:
+            label = "toggle all"
+        else:
+            label = "toggle remaining"
+        return label, any_active, all_active
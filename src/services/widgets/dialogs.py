@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from typing import Optional
 
-from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.screen import ModalScreen
@@ -10,6 +9,8 @@ from textual.widgets import Static
 
 from domain.rules import Rule
 
+from .rule_text import rule_details
+
 
 class ConfirmDialog(ModalScreen[bool]):
     BINDINGS = [("y", "yes", "Yes"), ("n", "no", "No"), ("escape", "no", "Cancel")]
@@ -43,50 +44,33 @@ class ConfirmDialog(ModalScreen[bool]):
 
     def compose(self) -> ComposeResult:
         """Simple yes/no modal."""
-        summary = self._build_rule_summary()
         yield Vertical(
             Static("Delete rule", classes="title"),
-            Static(self.message),
-            *([Static(summary, classes="rule", markup=False)] if summary else []),
+            Static(self.message, id="confirm_message"),
+            Static("", classes="rule", id="confirm_rule", markup=False),
             Static("[y]es / [n]o", classes="buttons", markup=False),
         )
 
+    def on_mount(self) -> None:
+        self._message_widget = self.query_one("#confirm_message", Static)
+        self._rule_widget = self.query_one("#confirm_rule", Static)
+        self._show_content()
+
+    def configure(self, message: str, rule: Optional[Rule] = None) -> None:
+        """Point the dialog at another rule so one instance can be pushed again."""
+        self.message = message
+        self.rule = rule
+        if self.is_mounted:
+            self._show_content()
+
+    def _show_content(self) -> None:
+        summary = rule_details(self.rule) if self.rule else None
+        self._message_widget.update(self.message)
+        self._rule_widget.update(summary or "")
+        self._rule_widget.display = summary is not None
+
     def action_yes(self) -> None:
         self.dismiss(True)
 
     def action_no(self) -> None:
         self.dismiss(False)
-
-    def _build_rule_summary(self) -> Optional[Text]:
-        if not self.rule:
-            return None
-        action_map = {
-            "ALLOW": "#4ade80",  # green
-            "DENY": "#facc15",   # yellow
-            "REJECT": "#ef4444", # red
-        }
-        action_color = action_map.get(self.rule.type_name.upper(), "sky_blue3")
-        summary = Text()
-        summary.append("ID: ", style="bold")
-        summary.append(self.rule.short_id, style="sky_blue3 bold")
-        summary.append("  ")
-        summary.append("Action: ", style="bold")
-        summary.append(self.rule.type_name, style=action_color)
-        summary.append("  ")
-        summary.append("Direction: ", style="bold")
-        summary.append(self.rule.direction.value, style="sky_blue3")
-        summary.append("  ")
-        summary.append("Protocol: ", style="bold")
-        summary.append(self.rule.protocol.value, style="sky_blue3")
-        if self.rule.port:
-            summary.append("  ")
-            summary.append("Port: ", style="bold")
-            summary.append(self.rule.port, style="sky_blue3")
-        if self.rule.interface:
-            summary.append("  ")
-            summary.append("Iface: ", style="bold")
-            summary.append(self.rule.interface, style="sky_blue3")
-        summary.append("  ")
-        summary.append("Active: ", style="bold")
-        summary.append("ON" if self.rule.active else "OFF", style="green" if self.rule.active else "red")
-        return summary
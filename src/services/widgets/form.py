@@ -1,21 +1,55 @@
 from __future__ import annotations
 
-import socket
-from pathlib import Path
-from typing import Callable, List, Optional, Tuple
+import re
+from typing import Callable, Dict, List, Optional, Tuple
 
-from rich.text import Text
 from textual import events
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.message import Message
 from textual.screen import ModalScreen
+from textual.timer import Timer
 from textual.widgets import Input, OptionList, Static
-from textual.widgets._option_list import Option
+from textual.widgets._option_list import Option, OptionDoesNotExist
 
-from domain.rules import Rule
+from domain.rules import Rule, list_system_interfaces
 from domain.types import Direction, Protocol
 
+from .rule_text import rule_summary
+
+# Only one form is open at a time, so the static choices are built once.
+_ACTION_OPTIONS = (Option("Accept", "allow"), Option("Drop", "deny"), Option("Reject", "reject"))
+_DIRECTION_OPTIONS = tuple(Option(direction.value, direction.value) for direction in Direction)
+_PROTOCOL_OPTIONS = tuple(Option(protocol.value, protocol.value) for protocol in Protocol)
+
+# "*", a single port, or a start-end / start:end range; bounds are checked by Rule.
+_PORT_RE = re.compile(r"\A(?:\*|\d+(?:\s*[-:]\s*\d+)?)\Z")
+
+# Seconds to wait after the last keystroke before filtering interfaces.
+_FILTER_DELAY = 0.05
+
+# (system interface names, (name, lowercased name) pairs) for the last listing seen.
+_IFACE_PAIRS: Optional[Tuple[Tuple[str, ...], List[Tuple[str, str]]]] = None
+
+
+def _load_interfaces() -> List[Tuple[str, str]]:
+    """Return sorted (name, lowercased name) pairs for the current interfaces."""
+    global _IFACE_PAIRS
+    # Same cached enumeration Rule validates against, so suggestions stay accepted.
+    names = list_system_interfaces()
+    if _IFACE_PAIRS is None or _IFACE_PAIRS[0] is not names:
+        # Lowercase once here so filtering on each keystroke is a bare substring test.
+        _IFACE_PAIRS = (names, [(name, name.lower()) for name in names])
+    return _IFACE_PAIRS[1]
+
+
+def _index_of(widget: OptionList, option_id: str) -> Optional[int]:
+    """Return the index of an option by id via OptionList's own id map, or None."""
+    try:
+        return widget.get_option_index(option_id)
+    except OptionDoesNotExist:
+        return None
+
 
 class RuleForm(Static):
     class Submitted(Message):
@@ -62,55 +96,42 @@ class RuleForm(Static):
     def __init__(self, initial_rule: Optional[Rule] = None, **kwargs) -> None:
         super().__init__(**kwargs)
         self.initial_rule = initial_rule
-        self._interfaces = self._load_interfaces()
+        self._interfaces = _load_interfaces()
+        self._last_needle: Optional[str] = None
+        self._last_matches: List[Tuple[str, str]] = self._interfaces
+        self._pending_query: Optional[str] = None
+        self._filter_timer: Optional[Timer] = None
+        self._has_error = False
+        # Interface names currently shown in the suggestion list.
+        self._displayed_ifaces: List[str] = [name for name, _ in self._interfaces]
+        self._option_pool: Dict[str, Option] = {}
 
     def compose(self) -> ComposeResult:
         """Build the add/edit form with action/direction/protocol/port/interface controls."""
         title = "Edit rule" if self.initial_rule else "Add rule"
         yield Static(f"{title} (↑/↓ to choose, Tab to move, Enter to submit, Esc to cancel)")
         if self.initial_rule:
-            action_map = {
-                "ALLOW": "#4ade80",  # green
-                "DROP": "#facc15",   # yellow
-                "REJECT": "#ef4444", # red
-            }
-            action_color = action_map.get(self.initial_rule.type_name.upper(), "sky_blue3")
-            summary = Text()
-            summary.append("ID: ", style="bold")
-            summary.append(self.initial_rule.short_id, style="sky_blue3 bold")
-            summary.append("  ")
-            summary.append("Current: ", style="bold")
-            summary.append(self.initial_rule.type_name, style=action_color)
-            summary.append(" ")
-            summary.append(self.initial_rule.direction.value, style="sky_blue3")
-            summary.append(" ")
-            summary.append(self.initial_rule.protocol.value, style="sky_blue3")
-            if self.initial_rule.port:
-                summary.append(f" {self.initial_rule.port}", style="sky_blue3")
-            if self.initial_rule.interface:
-                summary.append(f" [{self.initial_rule.interface}]", style="sky_blue3")
-            yield Static(summary, classes="hint", markup=False)
+            yield Static(rule_summary(self.initial_rule), classes="hint", markup=False)
         yield Static("", id="form_error")
-        yield OptionList(Option("Accept", "allow"), Option("Drop", "deny"), Option("Reject", "reject"), id="action")
-        yield OptionList(
-            Option(Direction.IN.value, Direction.IN.value),
-            Option(Direction.OUT.value, Direction.OUT.value),
-            Option(Direction.FORWARD.value, Direction.FORWARD.value),
-            id="direction",
-        )
-        yield OptionList(
-            Option(Protocol.TCP.value, Protocol.TCP.value),
-            Option(Protocol.UDP.value, Protocol.UDP.value),
-            Option(Protocol.ICMP.value, Protocol.ICMP.value),
-            id="protocol",
-        )
+        yield OptionList(*_ACTION_OPTIONS, id="action")
+        yield OptionList(*_DIRECTION_OPTIONS, id="direction")
+        yield OptionList(*_PROTOCOL_OPTIONS, id="protocol")
         yield Input(placeholder="Port (empty for ICMP)", id="port")
         yield Input(placeholder="Interface (optional, type to filter)", id="interface")
-        yield OptionList(*[Option(name, name) for name in self._interfaces], id="interface_options")
+        self._option_pool = {name: Option(name, name) for name in self._displayed_ifaces}
+        yield OptionList(*self._option_pool.values(), id="interface_options")
 
     def on_mount(self) -> None:
+        # Resolve child widgets once; key and submit handlers reuse them.
+        self._action_list = self.query_one("#action", OptionList)
+        self._direction_list = self.query_one("#direction", OptionList)
+        self._protocol_list = self.query_one("#protocol", OptionList)
+        self._port_input = self.query_one("#port", Input)
+        self._iface_input = self.query_one("#interface", Input)
+        self._iface_options = self.query_one("#interface_options", OptionList)
+        self._error_widget = self.query_one("#form_error", Static)
         self._highlight_defaults()
-        self.query_one("#action", OptionList).focus()
+        self._action_list.focus()
 
     def on_mouse_down(self, event: events.MouseDown) -> None:
         event.stop()
@@ -136,7 +157,11 @@ class RuleForm(Static):
     def on_input_changed(self, event: Input.Changed) -> None:
         self.set_error(None)
         if getattr(event.input, "id", None) == "interface":
-            self._filter_interface_options(event.value)
+            # Debounce: a burst of keystrokes filters once, with the latest text.
+            self._pending_query = event.value
+            if self._filter_timer is not None:
+                self._filter_timer.stop()
+            self._filter_timer = self.set_timer(_FILTER_DELAY, self._flush_interface_filter, name="iface_filter")
 
     def on_input_submitted(self, event: Input.Submitted) -> None:
         if getattr(event.input, "id", None) == "interface":
@@ -152,32 +177,26 @@ class RuleForm(Static):
     def action_submit(self) -> None:
         """Collect the current selections and emit a Submitted message."""
         self.set_error(None)
-        action_select = self.query_one("#action", OptionList)
-        direction_select = self.query_one("#direction", OptionList)
-        protocol_select = self.query_one("#protocol", OptionList)
-        port_input = self.query_one("#port", Input)
-        iface_input = self.query_one("#interface", Input)
+        action_select = self._action_list
+        direction_select = self._direction_list
+        protocol_select = self._protocol_list
+        port_input = self._port_input
+        iface_input = self._iface_input
 
         action = (action_select.highlighted_option or action_select.get_option_at_index(0)).id.lower()
         direction = Direction((direction_select.highlighted_option or direction_select.get_option_at_index(0)).id)
         protocol = Protocol((protocol_select.highlighted_option or protocol_select.get_option_at_index(0)).id)
 
         port_value = port_input.value.strip()
-        port: Optional[str] = None
-        if port_value:
-            if port_value == "*":
-                port = "*"
-            elif "-" in port_value or ":" in port_value:
-                port = port_value
-            elif port_value.isdigit():
-                port = port_value
-            else:
-                port = None
+        if port_value and not _PORT_RE.match(port_value):
+            self.set_error("Port must be a number, a range (start-end) or '*'")
+            return
+        port = port_value or None
 
         interface_value = iface_input.value.strip()
         interface = interface_value or None
 
-        rule_id = str(self.initial_rule.id) if self.initial_rule else None
+        rule_id = self.initial_rule.id_str if self.initial_rule else None
         self.post_message(RuleForm.Submitted(action, direction, protocol, port, interface, rule_id=rule_id))
 
     def _highlight_defaults(self) -> None:
@@ -195,50 +214,50 @@ class RuleForm(Static):
             defaults["port"] = self.initial_rule.port or ""
             defaults["interface"] = self.initial_rule.interface or ""
 
-        for opt_list, value in [
-            ("action", defaults["action"]),
-            ("direction", defaults["direction"]),
-            ("protocol", defaults["protocol"]),
+        for widget, value in [
+            (self._action_list, defaults["action"]),
+            (self._direction_list, defaults["direction"]),
+            (self._protocol_list, defaults["protocol"]),
         ]:
-            widget = self.query_one(f"#{opt_list}", OptionList)
             if value:
-                for idx, option in enumerate(widget.options):
-                    if option.id.lower() == value.lower():
-                        widget.highlighted = idx
-                        break
+                index = _index_of(widget, value)
+                if index is not None:
+                    widget.highlighted = index
             if widget.highlighted is None and widget.option_count:
                 widget.highlighted = 0
 
-        port_input = self.query_one("#port", Input)
-        port_input.value = defaults["port"]
-        iface_input = self.query_one("#interface", Input)
+        self._port_input.value = defaults["port"]
+        iface_input = self._iface_input
         iface_input.value = defaults["interface"]
-        self._filter_interface_options(iface_input.value)
-        self.set_error(None)
-
-    def _load_interfaces(self) -> List[str]:
-        sysfs = Path("/sys/class/net")
-        if sysfs.exists():
-            names = [path.name for path in sysfs.iterdir() if path.is_dir()]
+        if iface_input.value:
+            self._filter_interface_options(iface_input.value)
         else:
-            try:
-                names = [name for _, name in socket.if_nameindex()]
-            except OSError:
-                names = []
-        return sorted({name for name in names if name}, key=str.lower)
+            # compose() already listed every interface; only the highlight is needed.
+            option_list = self._iface_options
+            option_list.highlighted = 0 if option_list.option_count else None
+        self.set_error(None)
 
     def _filter_interface_options(self, query: str) -> None:
-        option_list = self.query_one("#interface_options", OptionList)
-        previous = option_list.highlighted_option.id if option_list.highlighted_option else None
         needle = query.strip().lower()
-        if needle:
-            matches = [name for name in self._interfaces if needle in name.lower()]
+        if needle == self._last_needle:
+            return
+        # A needle containing the previous one can only narrow its matches.
+        if self._last_needle and self._last_needle in needle:
+            candidates = self._last_matches
         else:
-            matches = list(self._interfaces)
+            candidates = self._interfaces
+        self._last_needle = needle
+        self._last_matches = [pair for pair in candidates if needle in pair[1]]
+        option_list = self._iface_options
+        previous = option_list.highlighted_option.id if option_list.highlighted_option else None
+        matches = [name for name, _ in self._last_matches]
+        if matches == self._displayed_ifaces:
+            return
+        self._displayed_ifaces = matches
 
+        # One clear plus one bulk add, reusing the Options built in compose().
         option_list.clear_options()
-        for name in matches:
-            option_list.add_option(Option(name, name))
+        option_list.add_options([self._option_pool[name] for name in matches])
 
         if not matches:
             option_list.highlighted = None
@@ -248,12 +267,22 @@ class RuleForm(Static):
         else:
             option_list.highlighted = 0
 
+    def _flush_interface_filter(self) -> None:
+        """Run a debounced filter now so suggestions match the current text."""
+        if self._filter_timer is not None:
+            self._filter_timer.stop()
+            self._filter_timer = None
+        if self._pending_query is not None:
+            query, self._pending_query = self._pending_query, None
+            self._filter_interface_options(query)
+
     def _accept_interface_highlight(self) -> bool:
-        option_list = self.query_one("#interface_options", OptionList)
+        self._flush_interface_filter()
+        option_list = self._iface_options
         highlighted = option_list.highlighted_option
         if highlighted is None:
             return False
-        iface_input = self.query_one("#interface", Input)
+        iface_input = self._iface_input
         iface_input.value = str(highlighted.id)
         if hasattr(iface_input, "cursor_position"):
             iface_input.cursor_position = len(iface_input.value)
@@ -261,13 +290,14 @@ class RuleForm(Static):
         return True
 
     def _fill_interface_from_suggestion(self) -> bool:
-        option_list = self.query_one("#interface_options", OptionList)
+        self._flush_interface_filter()
+        option_list = self._iface_options
         highlighted = option_list.highlighted_option
         if highlighted is None and option_list.option_count:
             highlighted = option_list.get_option_at_index(0)
         if highlighted is None:
             return False
-        iface_input = self.query_one("#interface", Input)
+        iface_input = self._iface_input
         suggestion = str(highlighted.id)
         if iface_input.value.strip() == suggestion:
             return False
@@ -277,8 +307,11 @@ class RuleForm(Static):
         return True
 
     def set_error(self, message: Optional[str]) -> None:
-        error = self.query_one("#form_error", Static)
-        error.update(message or "")
+        if not message and not self._has_error:
+            # Nothing shown; skip the DOM query and the no-op refresh.
+            return
+        self._error_widget.update(message or "")
+        self._has_error = bool(message)
 
 
 class AddRuleScreen(ModalScreen[Optional[RuleForm.Submitted]]):
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import List, Mapping, Tuple, Union
+
+from rich.text import Text
+
+from domain.rules import Rule
+
+# Keyed by Rule.type_name.
+ACTION_COLORS: Mapping[str, str] = MappingProxyType({
+    "ALLOW": "#4ade80",  # green
+    "DENY": "#facc15",   # yellow
+    "REJECT": "#ef4444", # red
+})
+
+
+def rule_summary(rule: Rule) -> Text:
+    """Compact one-line rule summary shown at the top of the edit form."""
+    parts: List[Union[str, Tuple[str, str]]] = [
+        ("ID: ", "bold"), (rule.short_id, "sky_blue3 bold"), "  ",
+        ("Current: ", "bold"), (rule.type_name, _action_color(rule)), " ",
+        (rule.direction.value, "sky_blue3"), " ",
+        (rule.protocol.value, "sky_blue3"),
+    ]
+    if rule.port:
+        parts.append((f" {rule.port}", "sky_blue3"))
+    if rule.interface:
+        parts.append((f" [{rule.interface}]", "sky_blue3"))
+    return Text.assemble(*parts)
+
+
+def rule_details(rule: Rule) -> Text:
+    """Labelled one-line rule description, including its active state."""
+    parts: List[Union[str, Tuple[str, str]]] = [
+        ("ID: ", "bold"), (rule.short_id, "sky_blue3 bold"), "  ",
+        ("Action: ", "bold"), (rule.type_name, _action_color(rule)), "  ",
+        ("Direction: ", "bold"), (rule.direction.value, "sky_blue3"), "  ",
+        ("Protocol: ", "bold"), (rule.protocol.value, "sky_blue3"),
+    ]
+    if rule.port:
+        parts += ["  ", ("Port: ", "bold"), (rule.port, "sky_blue3")]
+    if rule.interface:
+        parts += ["  ", ("Iface: ", "bold"), (rule.interface, "sky_blue3")]
+    parts += ["  ", ("Active: ", "bold"), ("ON", "green") if rule.active else ("OFF", "red")]
+    return Text.assemble(*parts)
+
+
+def _action_color(rule: Rule) -> str:
+    return ACTION_COLORS.get(rule.type_name.upper(), "sky_blue3")
@@ -1,14 +1,52 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
 
+from rich.text import Text
 from textual.app import ComposeResult
+from textual.message import Message
 from textual.widgets import DataTable, Static
+from textual.widgets.data_table import CellDoesNotExist
 
 from domain.rules import Rule
 
+_Cell = Union[str, Text]
+
+_COLUMN_LABELS = ("ID", "Action", "Direction", "Protocol", "Port", "Iface", "Active")
+_COLUMN_KEYS = tuple(label.lower() for label in _COLUMN_LABELS)
+# Pre-built cells: DataTable renders Text as-is instead of parsing markup per row.
+_ACTIVE_ON = Text.from_markup("[green]ON[/green]")
+_ACTIVE_OFF = Text.from_markup("[red]OFF[/red]")
+_DASH = Text("-")
+# Rule count from which row cells are formatted in a worker thread.
+_THREADED_BUILD_MIN = 500
+
+
+@dataclass(slots=True)
+class _RuleView:
+    """Formatted row cells for one rule state."""
+
+    state: tuple
+    cells: Tuple[_Cell, ...]
+
 
 class RuleTable(Static):
+    class RowsBuilt(Message):
+        bubble = False
+
+        def __init__(
+            self,
+            generation: int,
+            rows: List[Tuple[str, Tuple[_Cell, ...]]],
+            views: Dict[str, _RuleView],
+        ) -> None:
+            super().__init__()
+            self.generation = generation
+            self.rows = rows
+            self.views = views
+
     DEFAULT_CSS = """
     RuleTable DataTable {
         height: 1fr;
@@ -17,42 +55,150 @@ class RuleTable(Static):
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self._row_keys: List[str] = []
+        # Rule id -> row position, in row order; DataTable row keys are the rule ids.
+        self._row_index: Dict[str, int] = {}
+        # Last rendered cells per rule id, used to diff refreshes.
+        self._row_snapshots: Dict[str, Tuple[_Cell, ...]] = {}
         self.table = DataTable(zebra_stripes=True)
+        # Bumped by every update_rules call so stale threaded builds are dropped.
+        self._generation = 0
+        self._pending_rules: Optional[List[Rule]] = None
+        # Formatted cells per rule id, reused while the rule is unchanged.
+        self._views: Dict[str, _RuleView] = {}
 
     def compose(self) -> ComposeResult:
         """Create the rules data table with columns."""
-        self.table.add_columns("ID", "Action", "Direction", "Protocol", "Port", "Iface", "Active")
+        # The DataTable outlives recomposes, so only add the columns once.
+        if not self.table.columns:
+            for label, key in zip(_COLUMN_LABELS, _COLUMN_KEYS):
+                self.table.add_column(label, key=key)
         yield self.table
 
     def update_rules(self, rules: List[Rule]) -> None:
-        """Refresh table rows from the given rules list."""
-        self.table.clear(columns=False)
-        self._row_keys = []
+        """Refresh table rows from the given rules list, touching only what changed."""
+        self._generation += 1
+        if len(rules) < _THREADED_BUILD_MIN:
+            self._apply_rows(self._generation, *self._build_rows(rules))
+            return
+        # Large lists format their cells in a worker; only the diff runs on the UI thread.
+        # The worker gets its own list so adds/removes on the UI thread cannot disturb it.
+        rules = list(rules)
+        self._pending_rules = rules
+        self.run_worker(
+            partial(self._build_rows_in_thread, self._generation, rules),
+            thread=True,
+            exclusive=True,
+            group="rule_rows",
+        )
+
+    def _build_rows_in_thread(self, generation: int, rules: List[Rule]) -> None:
+        self.post_message(self.RowsBuilt(generation, *self._build_rows(rules)))
+
+    def on_rule_table_rows_built(self, message: RowsBuilt) -> None:
+        self._apply_rows(message.generation, message.rows, message.views)
+
+    def _build_rows(
+        self, rules: List[Rule]
+    ) -> Tuple[List[Tuple[str, Tuple[_Cell, ...]]], Dict[str, _RuleView]]:
+        """Return (row key, cells) pairs and the view cache they came from."""
+        # May run off the UI thread: only reads self._views, the caller installs the result.
+        previous = self._views
+        views: Dict[str, _RuleView] = {}
+        rows = []
         for rule in rules:
-            active_label = "[green]ON[/green]" if rule.active else "[red]OFF[/red]"
-            self.table.add_row(
-                rule.short_id,
-                rule.type_name,
-                rule.direction.value,
-                rule.protocol.value,
-                rule.port if rule.port is not None else "-",
-                rule.interface or "-",
-                active_label,
-            )
-            self._row_keys.append(str(rule.id))
-        if self.table.row_count:
-            self.table.cursor_coordinate = (0, 0)
+            key = rule.id_str
+            # Read the rule once; the cells are formatted from this snapshot only.
+            state = (rule.active, rule.type_name, rule.direction, rule.protocol, rule.port, rule.interface)
+            view = previous.get(key)
+            if view is None or view.state != state:
+                view = _RuleView(state, self._row_cells(rule.short_id, state))
+            views[key] = view
+            rows.append((key, view.cells))
+        return rows, views
+
+    def _apply_rows(
+        self,
+        generation: int,
+        rows: List[Tuple[str, Tuple[_Cell, ...]]],
+        views: Dict[str, _RuleView],
+    ) -> None:
+        """Diff prepared rows into the DataTable."""
+        if generation != self._generation:
+            # A newer update_rules call superseded this build.
+            return
+        self._pending_rules = None
+        self._views = views
+        snapshots = dict(rows)
+        new_keys = [key for key, _ in rows]
+        selected = self.get_selected_rule_id()
+        previous_row = self.table.cursor_coordinate.row if self.table.row_count else 0
+
+        # One refresh cycle for the whole diff instead of one per row.
+        with self.app.batch_update():
+            # Rules are only ever appended, replaced or removed, so surviving rows
+            # keep their order; anything else (e.g. a reload) gets a full rebuild.
+            kept = [key for key in self._row_index if key in snapshots]
+            if kept != new_keys[: len(kept)]:
+                self.table.clear(columns=False)
+                self._row_snapshots = {}
+            for key in self._row_index:
+                if key not in snapshots and key in self._row_snapshots:
+                    self.table.remove_row(key)
+            for key, cells in rows:
+                old = self._row_snapshots.get(key)
+                if old is None:
+                    self.table.add_row(*cells, key=key)
+                elif old != cells:
+                    for column, before, after in zip(_COLUMN_KEYS, old, cells):
+                        if before != after:
+                            self.table.update_cell(key, column, after, update_width=True)
+        self._row_index = {key: index for index, key in enumerate(new_keys)}
+        self._row_snapshots = snapshots
+
+        if not self.table.row_count:
+            return
+        row = self._row_index.get(selected) if selected else None
+        if row is None:
+            row = min(previous_row, self.table.row_count - 1)
+        # Only move the cursor when it is not already on the selected rule's row;
+        # a full rebuild resets it to the top, removals may shift it.
+        if row != self.table.cursor_coordinate.row:
+            self.table.cursor_coordinate = (row, 0)
+
+    @staticmethod
+    def _row_cells(short_id: str, state: tuple) -> Tuple[_Cell, ...]:
+        active, type_name, direction, protocol, port, interface = state
+        return (
+            short_id,
+            type_name,
+            direction.value,
+            protocol.value,
+            port if port is not None else _DASH,
+            interface or _DASH,
+            _ACTIVE_ON if active else _ACTIVE_OFF,
+        )
+
+    def update_row_active(self, rule_id: str, active: bool) -> None:
+        """Rewrite only the Active cell of one rule's row."""
+        if self._pending_rules is not None:
+            # A threaded build may predate this toggle; rebuild from the live rules.
+            self.update_rules(self._pending_rules)
+            return
+        if rule_id not in self._row_index:
+            return
+        label = _ACTIVE_ON if active else _ACTIVE_OFF
+        self.table.update_cell(rule_id, "active", label)
+        self._row_snapshots[rule_id] = self._row_snapshots[rule_id][:-1] + (label,)
 
     def get_selected_rule_id(self) -> Optional[str]:
         """Return the UUID string of the highlighted rule, or None."""
-        coordinate = self.table.cursor_coordinate
-        if coordinate is None:
+        if not self.table.row_count:
+            return None
+        try:
+            cell_key = self.table.coordinate_to_cell_key(self.table.cursor_coordinate)
+        except CellDoesNotExist:
             return None
-        index = coordinate.row
-        if 0 <= index < len(self._row_keys):
-            return self._row_keys[index]
-        return None
+        return cell_key.row_key.value
 
     def focus_table(self) -> None:
         """Give focus to the underlying DataTable."""